@@ -0,0 +1,107 @@
+import os
+import copy
+import time
+import threading
+
+# Seconds a snapshot is served without touching the network. Fullnodes send no
+# ETag, so there is no conditional request: an older snapshot is refetched.
+SNAPSHOT_MAX_AGE = float(os.getenv("APTOS_SNAPSHOT_MAX_AGE", "30"))
+
+LEDGER_VERSION_HEADER = "x-aptos-ledger-version"
+
+
+def normalize_address(address):
+    """Returns the canonical string form used as the cache key for an address."""
+    address = str(address).lower()
+    if not address.startswith("0x"):
+        address = f"0x{address}"
+    return address
+
+
+class AccountSnapshotCache:
+    """Caches account resources keyed by (address, resource type).
+
+    Every snapshot is stamped with the ledger version reported by the fullnode.
+    Freshness is a TTL plus invalidation: transactions we submit ourselves are
+    registered as pending against the addresses they touch, and once they are
+    confirmed those addresses are invalidated so the next read refetches.
+    """
+
+    def __init__(self, max_age=SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self._snapshots = {}
+        # address -> pending hashes, and the reverse so a hash settles everywhere at once
+        self._pending = {}
+        self._pending_addresses = {}
+        self._lock = threading.Lock()
+
+    def get(self, address, resource_type):
+        """Returns a copy of the cached snapshot, or None if there is nothing cached."""
+        with self._lock:
+            snapshot = self._snapshots.get((normalize_address(address), resource_type))
+            return copy.deepcopy(snapshot)
+
+    def is_fresh(self, snapshot):
+        """Whether a snapshot can be served without refetching it."""
+        return snapshot is not None and time.monotonic() - snapshot["fetched_at"] < self.max_age
+
+    def put(self, address, resource_type, data, headers):
+        """Stores a freshly fetched resource along with its ledger version.
+
+        Returns a copy of the snapshot now cached, so callers never share the stored data.
+        """
+        key = (normalize_address(address), resource_type)
+        ledger_version = headers.get(LEDGER_VERSION_HEADER)
+        ledger_version = int(ledger_version) if ledger_version is not None else None
+        snapshot = {
+            "data": data,
+            "ledger_version": ledger_version,
+            "fetched_at": time.monotonic(),
+        }
+        with self._lock:
+            current = self._snapshots.get(key)
+            # Fullnodes behind a load balancer can lag each other; never
+            # replace a snapshot with one taken at an older ledger version.
+            if (
+                current is not None
+                and current["ledger_version"] is not None
+                and ledger_version is not None
+                and ledger_version < current["ledger_version"]
+            ):
+                return copy.deepcopy(current)
+            self._snapshots[key] = snapshot
+            return copy.deepcopy(snapshot)
+
+    def _invalidate(self, address):
+        for key in [key for key in self._snapshots if key[0] == address]:
+            del self._snapshots[key]
+
+    def invalidate(self, address):
+        """Drops every cached resource of an address."""
+        with self._lock:
+            self._invalidate(normalize_address(address))
+
+    def mark_pending(self, address, txn_hash):
+        """Registers a submitted transaction that touches an address."""
+        address = normalize_address(address)
+        with self._lock:
+            self._pending.setdefault(address, set()).add(txn_hash)
+            self._pending_addresses.setdefault(txn_hash, set()).add(address)
+            # Whatever was cached is about to go stale.
+            self._invalidate(address)
+
+    def pending(self, address):
+        """Returns the transactions still awaiting confirmation for an address."""
+        with self._lock:
+            return set(self._pending.get(normalize_address(address), ()))
+
+    def confirm(self, txn_hash):
+        """Invalidates every address touched by a now final transaction and forgets the hash."""
+        with self._lock:
+            for address in self._pending_addresses.pop(txn_hash, ()):
+                hashes = self._pending.get(address)
+                if hashes is not None:
+                    hashes.discard(txn_hash)
+                    if not hashes:
+                        del self._pending[address]
+                self._invalidate(address)
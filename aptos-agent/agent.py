@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 from aptos_sdk.account import Account
 from aptos_sdk.transactions import EntryFunction, TransactionArgument
 from aptos_sdk.type_tag import TypeTag, StructTag
-from aptos_sdk_wrapper import get_balance, fund_wallet, transfer, create_token
+from aptos_sdk_wrapper import get_balance, fund_wallet, transfer, create_token, get_account_resource_sync, snapshot_cache
 from groq import Groq
 
 # Load environment variables from .env file
@@ -112,10 +112,7 @@ def get_on_chain_data(resource_type, address_to_check=None):
     target_address = address_to_check if address_to_check else address
     
     try:
-        url = f"https://fullnode.testnet.aptoslabs.com/v1/accounts/{target_address}/resource/{resource_type}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return get_account_resource_sync(target_address, resource_type)
     except Exception as e:
         return f"Error fetching on-chain data: {str(e)}"
 
@@ -142,9 +139,14 @@ async def execute_entry_function(function_name, type_args, args):
             entry_function
         )
         tx_hash = await client.submit_bcs_transaction(signed_tx)
+        snapshot_cache.mark_pending(wallet.address(), tx_hash)
         
         # Wait for transaction confirmation
-        result = await client.wait_for_transaction(tx_hash)
+        try:
+            result = await client.wait_for_transaction(tx_hash)
+        finally:
+            # Aborted transactions still charge gas, so the wallet changed either way
+            snapshot_cache.confirm(tx_hash)
         return {
             "transaction_hash": tx_hash,
             "success": True,
@@ -1,11 +1,13 @@
 import os
+import requests
 from dotenv import load_dotenv
 from aptos_sdk.account import Account
 from aptos_sdk.account_address import AccountAddress
 from aptos_sdk.aptos_token_client import AptosTokenClient
-from aptos_sdk.async_client import FaucetClient, RestClient
+from aptos_sdk.async_client import ApiError, FaucetClient, RestClient
 from aptos_sdk.transactions import EntryFunction, TransactionArgument, TransactionPayload
 from aptos_sdk.bcs import Serializer
+from account_cache import AccountSnapshotCache
 
 # Load environment variables
 load_dotenv()
@@ -21,10 +23,94 @@ load_dotenv()
 # print(f"FAUCET_AUTH_TOKEN: {FAUCET_AUTH_TOKEN}")
 
 # Initialize clients
-rest_client = RestClient("https://api.testnet.aptoslabs.com/v1")
+NODE_URL = "https://api.testnet.aptoslabs.com/v1"
+rest_client = RestClient(NODE_URL)
 faucet_client = FaucetClient("https://faucet.testnet.aptoslabs.com", rest_client)
 token_client = AptosTokenClient(rest_client)
 
+# Account resources we have read, stamped with the ledger version they were read at
+snapshot_cache = AccountSnapshotCache()
+
+# The coin::balance view also counts APT migrated to the primary fungible store,
+# so the balance is cached as a view result rather than read from CoinStore
+APT_COIN_TYPE = "0x1::aptos_coin::AptosCoin"
+APT_BALANCE_VIEW = "0x1::coin::balance"
+APT_BALANCE_KEY = f"{APT_BALANCE_VIEW}<{APT_COIN_TYPE}>"
+
+async def settle_pending(wallet_address):
+    """Waits for our own pending transactions touching a wallet.
+
+    Each hash settles for every address it touched, not just this wallet.
+    """
+    for txn_hash in snapshot_cache.pending(wallet_address):
+        try:
+            await rest_client.wait_for_transaction(txn_hash)
+        except Exception as e:
+            # A failed transaction is still final, the account state just didn't change as expected
+            print(f"Pending transaction {txn_hash} did not succeed: {str(e)}")
+        snapshot_cache.confirm(txn_hash)
+
+async def get_cached(wallet_address, key, fetch):
+    """Returns a copy of the cached data for (wallet, key), calling `fetch` for a response when stale."""
+    await settle_pending(wallet_address)
+
+    snapshot = snapshot_cache.get(wallet_address, key)
+    if snapshot_cache.is_fresh(snapshot):
+        return snapshot["data"]
+
+    response = await fetch()
+    if response.status_code >= 400:
+        raise ApiError(response.text, response.status_code)
+    return snapshot_cache.put(wallet_address, key, response.json(), response.headers)["data"]
+
+async def get_account_resource(wallet_address, resource_type):
+    """Retrieves a copy of an account resource, served from the snapshot cache while it is fresh."""
+    if isinstance(wallet_address, str):
+        wallet_address = AccountAddress.from_str(wallet_address)
+    return await get_cached(
+        wallet_address,
+        resource_type,
+        lambda: rest_client.client.get(f"{NODE_URL}/accounts/{wallet_address}/resource/{resource_type}"),
+    )
+
+def settle_pending_sync(wallet_address):
+    """Confirms pending transactions that have left the mempool, without waiting for the rest.
+
+    Returns False while any of them is still pending.
+    """
+    settled = True
+    for txn_hash in snapshot_cache.pending(wallet_address):
+        try:
+            response = requests.get(f"{NODE_URL}/transactions/by_hash/{txn_hash}")
+        except requests.exceptions.RequestException:
+            settled = False
+            continue
+        # Unknown hashes were dropped from the mempool, which is final too
+        if response.status_code == 404 or (
+            response.status_code == 200 and response.json().get("type") != "pending_transaction"
+        ):
+            snapshot_cache.confirm(txn_hash)
+        else:
+            settled = False
+    return settled
+
+def get_account_resource_sync(wallet_address, resource_type):
+    """Same as get_account_resource, for callers that cannot run the event loop (e.g. tools called from /chat)."""
+    if isinstance(wallet_address, str):
+        wallet_address = AccountAddress.from_str(wallet_address)
+    settled = settle_pending_sync(wallet_address)
+
+    snapshot = snapshot_cache.get(wallet_address, resource_type)
+    if snapshot_cache.is_fresh(snapshot):
+        return snapshot["data"]
+
+    response = requests.get(f"{NODE_URL}/accounts/{wallet_address}/resource/{resource_type}")
+    response.raise_for_status()
+    if not settled:
+        # One of our transactions may still change this, so don't cache what we read
+        return response.json()
+    return snapshot_cache.put(wallet_address, resource_type, response.json(), response.headers)["data"]
+
 async def fund_wallet(wallet_address, amount):
     """Funds a wallet with a specified amount of APT."""
     print(f"Funding wallet: {wallet_address} with {amount} APT")
@@ -36,6 +122,8 @@ async def fund_wallet(wallet_address, amount):
         wallet_address = AccountAddress.from_str(wallet_address)
 
     txn_hash = await faucet_client.fund_account(wallet_address, octas, True)
+    # The faucet waits for the transaction, so it is already confirmed here
+    snapshot_cache.invalidate(wallet_address)
     print(f"Transaction hash: {txn_hash}\nFunded wallet: {wallet_address}")
     return wallet_address
 
@@ -44,7 +132,15 @@ async def get_balance(wallet_address):
     print(f"Getting balance for wallet: {wallet_address}")
     if isinstance(wallet_address, str):
         wallet_address = AccountAddress.from_str(wallet_address)
-    balance = await rest_client.account_balance(wallet_address)
+    result = await get_cached(
+        wallet_address,
+        APT_BALANCE_KEY,
+        lambda: rest_client.client.post(
+            f"{NODE_URL}/view",
+            json={"function": APT_BALANCE_VIEW, "type_arguments": [APT_COIN_TYPE], "arguments": [str(wallet_address)]},
+        ),
+    )
+    balance = int(result[0])
     balance_in_apt = balance / 10**8  # Convert octas to APT
     print(f"Wallet balance: {balance_in_apt:.2f} APT")  # Show balance with 2 decimal places
     return balance
@@ -54,6 +150,8 @@ async def transfer(sender: Account, receiver, amount):
     if isinstance(receiver, str):
         receiver = AccountAddress.from_str(receiver)
     txn_hash = await rest_client.bcs_transfer(sender, receiver, amount)
+    snapshot_cache.mark_pending(sender.address(), txn_hash)
+    snapshot_cache.mark_pending(receiver, txn_hash)
     print(f"Transaction hash: {txn_hash} and receiver: {receiver}")
     return txn_hash
 
@@ -76,5 +174,6 @@ async def create_token(sender: Account, name: str, symbol: str, icon_uri: str, p
         sender, TransactionPayload(payload)
     )
     txn_hash = await rest_client.submit_bcs_transaction(signed_transaction)
+    snapshot_cache.mark_pending(sender.address(), txn_hash)
     print(f"Transaction hash: {txn_hash}")
     return txn_hash
\ No newline at end of file
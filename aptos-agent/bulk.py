@@ -0,0 +1,548 @@
+import os
+import io
+import csv
+import codecs
+import queue
+import sys
+import json
+import asyncio
+import argparse
+from aptos_sdk.async_client import ApiError
+from aptos_sdk.bcs import Serializer
+from aptos_sdk.transactions import EntryFunction, TransactionArgument, TransactionPayload
+from aptos_sdk_wrapper import rest_client, snapshot_cache
+from agent import wallet, address, loop, HEALTHCARE_MODULE_ADDRESS, HEALTHCARE_MODULE_NAME
+
+# Transactions submitted back to back before waiting for the chunk to confirm.
+# The fullnode mempool parks at most 100 transactions per account.
+MAX_CHUNK_SIZE = 100
+DEFAULT_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "50"))
+
+# Lines buffered between a streamed upload and the CSV parser thread
+LINE_QUEUE_SIZE = 1000
+
+# Where API imports keep their checkpoints, one per upload ID
+BULK_CHECKPOINT_DIR = os.getenv("BULK_CHECKPOINT_DIR", ".bulk-checkpoints")
+
+# How long the account sequence number must stay unchanged before submitting,
+# so transactions left in the mempool by a killed run are committed first
+SEQUENCE_SETTLE_INTERVAL = 2
+SEQUENCE_SETTLE_TIMEOUT = 60
+
+# Entry function arguments in the order the healthcare module declares them,
+# along with the view function used to dedupe and export each kind of row
+BULK_KINDS = {
+    "patients": {
+        "entry_function": "add_patient",
+        "view_function": "get_patients",
+        "id_field": "patient_id",
+        "fields": [
+            ("patient_id", Serializer.str),
+            ("name", Serializer.str),
+            ("age", Serializer.u8),
+            ("gender", Serializer.str),
+            ("contact", Serializer.str),
+            ("email", Serializer.str),
+            ("address", Serializer.str),
+            ("medical_history", Serializer.str),
+        ],
+    },
+    "records": {
+        "entry_function": "add_medical_record",
+        "view_function": "get_patient_records",
+        "id_field": "record_id",
+        "fields": [
+            ("record_id", Serializer.str),
+            ("patient_id", Serializer.str),
+            ("record_type", Serializer.str),
+            ("diagnosis", Serializer.str),
+            ("treatment", Serializer.str),
+            ("notes", Serializer.str),
+        ],
+    },
+    "appointments": {
+        "entry_function": "schedule_appointment",
+        "view_function": "get_patient_appointments",
+        "id_field": "appointment_id",
+        "fields": [
+            ("appointment_id", Serializer.str),
+            ("patient_id", Serializer.str),
+            ("date", Serializer.str),
+            ("time", Serializer.str),
+            ("purpose", Serializer.str),
+            ("status", Serializer.str),
+        ],
+    },
+}
+
+
+def _parse_json_line(row_number, line):
+    try:
+        return row_number, json.loads(line)
+    except json.JSONDecodeError as e:
+        return row_number, ValueError(f"invalid JSON: {str(e)}")
+
+
+def read_rows(lines, fmt):
+    """Yields (row_number, row) pairs from CSV or JSONL lines without loading them all.
+
+    Rows that cannot be parsed come out as a ValueError in place of the row,
+    so one bad line is reported without stopping the import.
+    """
+    if fmt == "jsonl":
+        row_number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            yield _parse_json_line(row_number, line)
+    elif fmt == "csv":
+        # csv.reader owns record boundaries, including quoted fields spanning lines
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            return
+        row_number = 0
+        while True:
+            try:
+                values = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                row_number += 1
+                yield row_number, ValueError(f"invalid CSV: {str(e)}")
+                continue
+            if not values:
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            else:
+                yield row_number, dict(zip(header, values))
+    else:
+        raise ValueError(f"Unsupported format: {fmt}. Use csv or jsonl")
+
+
+async def aread_rows(lines, fmt):
+    """Same as `read_rows` for an async iterable of lines.
+
+    CSV needs a blocking iterator, so `read_rows` runs in a worker thread fed
+    through a bounded queue while the lines arrive on the event loop.
+    """
+    if fmt == "jsonl":
+        row_number = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            yield _parse_json_line(row_number, line)
+        return
+
+    event_loop = asyncio.get_running_loop()
+    line_queue = queue.Queue(maxsize=LINE_QUEUE_SIZE)
+
+    async def put(line):
+        try:
+            line_queue.put_nowait(line)
+        except queue.Full:
+            await event_loop.run_in_executor(None, line_queue.put, line)
+
+    async def produce():
+        try:
+            async for line in lines:
+                await put(line)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Let the parser finish so the error surfaces from `await producer`
+            await put(None)
+            raise
+        await put(None)
+
+    rows = read_rows(iter(line_queue.get, None), fmt)
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            row = await event_loop.run_in_executor(None, next, rows, None)
+            if row is None:
+                break
+            yield row
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            # Unblock worker threads still waiting on either end of the queue
+            while not line_queue.empty():
+                line_queue.get_nowait()
+            line_queue.put_nowait(None)
+
+
+async def iter_lines(chunks):
+    """Splits an async stream of byte chunks, such as a request body, into decoded lines."""
+    # utf-8-sig drops the BOM that Excel writes at the start of CSV exports
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def detect_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def validate_row(kind, row):
+    """Returns the entry function arguments and normalized values for a row.
+
+    Raises ValueError when the row does not match the entry function signature.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"row must be an object, got {type(row).__name__}")
+    args = []
+    values = {}
+    for field, encoder in BULK_KINDS[kind]["fields"]:
+        value = row.get(field)
+        if value is None or value == "":
+            raise ValueError(f"missing {field}")
+        if encoder is Serializer.u8:
+            # int() would turn true into 1 and 30.7 into 30
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f"{field} must be an integer, got {value!r}")
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} must be an integer, got {value!r}")
+            if not 0 <= value <= 255:
+                raise ValueError(f"{field} must be between 0 and 255, got {value}")
+        else:
+            value = str(value)
+        args.append(TransactionArgument(value, encoder))
+        values[field] = value
+    return args, values
+
+
+async def call_view(view_function, arguments):
+    """Calls a healthcare view function and returns its single return value."""
+    response = await rest_client.client.post(
+        f"{rest_client.base_url}/view",
+        json={
+            "function": f"{HEALTHCARE_MODULE_ADDRESS}::{HEALTHCARE_MODULE_NAME}::{view_function}",
+            "type_arguments": [],
+            "arguments": arguments,
+        },
+    )
+    if response.status_code >= 400:
+        raise ApiError(response.text, response.status_code)
+    return response.json()[0]
+
+
+class ExistingIds:
+    """IDs of one kind already on chain for a provider, loaded lazily per patient."""
+
+    def __init__(self, provider_addr, kind):
+        self.provider_addr = provider_addr
+        self.kind = kind
+        self.patients = set()
+        self.ids = set()
+        self._loaded_patients = set()
+
+    async def load(self):
+        patients = await call_view("get_patients", [self.provider_addr])
+        self.patients = {patient["id"] for patient in patients}
+        if self.kind == "patients":
+            self.ids = self.patients
+
+    async def _load_patient(self, patient_id):
+        if patient_id in self._loaded_patients:
+            return
+        items = await call_view(BULK_KINDS[self.kind]["view_function"], [self.provider_addr, patient_id])
+        self.ids.update(item["id"] for item in items)
+        self._loaded_patients.add(patient_id)
+
+    async def contains(self, values):
+        """Whether a row's ID is already on chain (or queued earlier in this import).
+
+        `values` are the normalized values from `validate_row`, so IDs compare as
+        the strings that would be sent on chain.
+        """
+        if self.kind != "patients":
+            if values["patient_id"] not in self.patients:
+                raise ValueError(f"unknown patient {values['patient_id']}")
+            await self._load_patient(values["patient_id"])
+        return values[BULK_KINDS[self.kind]["id_field"]] in self.ids
+
+    def add(self, values):
+        self.ids.add(values[BULK_KINDS[self.kind]["id_field"]])
+
+
+def load_checkpoint(checkpoint_path):
+    """Returns the number of input rows a previous run already handled."""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path) as f:
+        return json.load(f).get("rows_done", 0)
+
+
+def save_checkpoint(checkpoint_path, rows_done):
+    if not checkpoint_path:
+        return
+    # Write then rename so an interrupted run never leaves a torn checkpoint
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"rows_done": rows_done}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def clamp_chunk_size(chunk_size):
+    return max(1, min(int(chunk_size), MAX_CHUNK_SIZE))
+
+
+def api_checkpoint_path(kind, upload_id):
+    """Checkpoint file for an API import, keyed by the client's upload ID."""
+    if not upload_id.replace("-", "").replace("_", "").isalnum():
+        raise ValueError("upload_id may only contain letters, digits, '-' and '_'")
+    os.makedirs(BULK_CHECKPOINT_DIR, exist_ok=True)
+    return os.path.join(BULK_CHECKPOINT_DIR, f"{kind}-{upload_id}.checkpoint")
+
+
+async def wait_for_settled_sequence_number():
+    """Waits until the wallet's sequence number stops moving and returns it.
+
+    Transactions still in the mempool from an interrupted run would otherwise
+    collide with the sequence numbers of the next chunk.
+    """
+    sequence_number = await rest_client.account_sequence_number(wallet.address())
+    waited = 0
+    while waited < SEQUENCE_SETTLE_TIMEOUT:
+        await asyncio.sleep(SEQUENCE_SETTLE_INTERVAL)
+        waited += SEQUENCE_SETTLE_INTERVAL
+        latest = await rest_client.account_sequence_number(wallet.address())
+        if latest == sequence_number:
+            return sequence_number
+        sequence_number = latest
+    raise RuntimeError(f"Sequence number still moving after {SEQUENCE_SETTLE_TIMEOUT}s, retry later")
+
+
+async def submit_chunk(kind, chunk, sequence_number, summary):
+    """Submits a chunk with consecutive sequence numbers, then waits for all of it.
+
+    Returns the row numbers whose transactions failed.
+    """
+    entry_function = BULK_KINDS[kind]["entry_function"]
+    submitted = []
+    submit_error = None
+    for row_number, args in chunk:
+        payload = EntryFunction.natural(
+            f"{HEALTHCARE_MODULE_ADDRESS}::{HEALTHCARE_MODULE_NAME}",
+            entry_function,
+            [],
+            args,
+        )
+        try:
+            signed_transaction = await rest_client.create_bcs_signed_transaction(
+                wallet, TransactionPayload(payload), sequence_number=sequence_number
+            )
+            txn_hash = await rest_client.submit_bcs_transaction(signed_transaction)
+        except Exception as e:
+            # Later transactions would be stuck behind the missing sequence number
+            submit_error = e
+            break
+        submitted.append((row_number, txn_hash))
+        sequence_number += 1
+
+    results = await asyncio.gather(
+        *(rest_client.wait_for_transaction(txn_hash) for _, txn_hash in submitted),
+        return_exceptions=True,
+    )
+    failed_rows = []
+    for (row_number, txn_hash), result in zip(submitted, results):
+        summary["submitted"] += 1
+        if isinstance(result, Exception):
+            summary["failed"] += 1
+            summary["errors"].append({"row": row_number, "transaction_hash": txn_hash, "error": str(result)})
+            failed_rows.append(row_number)
+        else:
+            summary["succeeded"] += 1
+    if submitted:
+        snapshot_cache.invalidate(wallet.address())
+
+    if submit_error is not None:
+        raise RuntimeError(f"Submitting row {chunk[len(submitted)][0]} failed: {str(submit_error)}")
+    return failed_rows
+
+
+async def _iterate(rows):
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def import_rows(kind, rows, chunk_size=DEFAULT_CHUNK_SIZE, checkpoint_path=None, progress=print):
+    """Validates, dedupes and submits rows of one kind in pipelined chunks.
+
+    `rows` is an iterable or async iterable of (row_number, row) pairs such as
+    `read_rows` yields. Rows at or before the checkpoint are skipped. The
+    checkpoint advances each time a chunk is confirmed, but never past a row
+    whose transaction failed, so rerunning the import retries it (rows that
+    did land are then skipped as duplicates).
+    """
+    if kind not in BULK_KINDS:
+        raise ValueError(f"Unknown kind: {kind}. Use one of {', '.join(BULK_KINDS)}")
+    chunk_size = clamp_chunk_size(chunk_size)
+    rows_done = load_checkpoint(checkpoint_path)
+    if rows_done:
+        progress(f"Resuming after row {rows_done}")
+
+    existing = ExistingIds(address, kind)
+    await existing.load()
+
+    summary = {"rows_read": 0, "submitted": 0, "succeeded": 0, "failed": 0,
+               "invalid": 0, "duplicates": 0, "errors": []}
+    chunk = []
+    last_row_number = rows_done
+    # Row before the first failed transaction; the checkpoint is held there
+    held_at = None
+    # Next sequence number to use, None until it has been read once settled
+    sequence_number = None
+
+    async def flush():
+        nonlocal chunk, held_at, sequence_number
+        if chunk:
+            if sequence_number is None:
+                sequence_number = await wait_for_settled_sequence_number()
+            failed_rows = await submit_chunk(kind, chunk, sequence_number, summary)
+            if failed_rows:
+                # A failed transaction may or may not have used its sequence number
+                sequence_number = None
+                if held_at is None:
+                    held_at = failed_rows[0] - 1
+            else:
+                sequence_number += len(chunk)
+            chunk = []
+        checkpoint = last_row_number if held_at is None else held_at
+        save_checkpoint(checkpoint_path, checkpoint)
+        progress(f"Row {last_row_number}: {summary['succeeded']} added, {summary['failed']} failed, "
+                 f"{summary['duplicates']} duplicates, {summary['invalid']} invalid")
+
+    async for row_number, row in _iterate(rows):
+        if row_number <= rows_done:
+            continue
+        summary["rows_read"] += 1
+        last_row_number = row_number
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            args, values = validate_row(kind, row)
+            if await existing.contains(values):
+                summary["duplicates"] += 1
+                continue
+        except ValueError as e:
+            summary["invalid"] += 1
+            summary["errors"].append({"row": row_number, "error": str(e)})
+            continue
+        existing.add(values)
+        chunk.append((row_number, args))
+        if len(chunk) >= chunk_size:
+            await flush()
+    await flush()
+
+    # A finished import has nothing left to resume, unless rows need retrying
+    if held_at is None and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return summary
+
+
+async def export_rows(kind, provider_addr=None, patients=None):
+    """Yields the on-chain rows of one kind, one view call at a time.
+
+    Pass `patients` when `get_patients` was already called, e.g. to surface
+    its errors before a response starts streaming.
+    """
+    if kind not in BULK_KINDS:
+        raise ValueError(f"Unknown kind: {kind}. Use one of {', '.join(BULK_KINDS)}")
+    provider_addr = provider_addr if provider_addr else address
+    id_field = BULK_KINDS[kind]["id_field"]
+    if patients is None:
+        patients = await call_view("get_patients", [provider_addr])
+    for patient in patients:
+        if kind == "patients":
+            items = [patient]
+        else:
+            items = await call_view(BULK_KINDS[kind]["view_function"], [provider_addr, patient["id"]])
+        for item in items:
+            # Rename `id` so exported files can be imported again as is
+            row = dict(item)
+            row[id_field] = row.pop("id")
+            yield row
+
+
+async def export_lines(kind, fmt, provider_addr=None, patients=None):
+    """Yields exported rows serialized as CSV or JSONL lines."""
+    fieldnames = None
+    async for row in export_rows(kind, provider_addr, patients):
+        if fmt == "jsonl":
+            yield json.dumps(row) + "\n"
+            continue
+        buffer = io.StringIO()
+        if fieldnames is None:
+            fieldnames = list(row)
+            csv.DictWriter(buffer, fieldnames=fieldnames).writeheader()
+        csv.DictWriter(buffer, fieldnames=fieldnames).writerow(row)
+        yield buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import and export of healthcare data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Load rows from a CSV or JSONL file")
+    import_parser.add_argument("kind", choices=list(BULK_KINDS))
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                               help=f"Transactions per chunk, 1 to {MAX_CHUNK_SIZE}")
+    import_parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint)")
+    import_parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    export_parser = subparsers.add_parser("export", help="Write on-chain rows as CSV or JSONL")
+    export_parser.add_argument("kind", choices=list(BULK_KINDS))
+    export_parser.add_argument("--output", help="Output file (default: stdout)")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"], default="jsonl")
+    export_parser.add_argument("--provider", help="Provider address (default: agent wallet)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        fmt = args.format or detect_format(args.path)
+        checkpoint_path = args.checkpoint or f"{args.path}.checkpoint"
+        if args.restart and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        with open(args.path, newline="", encoding="utf-8-sig") as f:
+            summary = loop.run_until_complete(import_rows(
+                args.kind, read_rows(f, fmt), args.chunk_size, checkpoint_path
+            ))
+        print(json.dumps(summary, indent=2))
+        return 1 if summary["failed"] or summary["invalid"] else 0
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        async def write_export():
+            async for line in export_lines(args.kind, args.format, args.provider):
+                output.write(line)
+        loop.run_until_complete(write_export())
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
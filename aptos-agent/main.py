@@ -1,8 +1,9 @@
 import asyncio
 import os
-from typing import Dict, List, Optional
-from fastapi import FastAPI, HTTPException
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -10,7 +11,11 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import the agent
-from agent import aptos_agent, close_event_loop
+from agent import aptos_agent, close_event_loop, address
+from bulk import (
+    BULK_KINDS, DEFAULT_CHUNK_SIZE, aread_rows, api_checkpoint_path, call_view,
+    export_lines, import_rows, iter_lines,
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,6 +47,15 @@ class HealthCheckResponse(BaseModel):
 class ChatHistoryResponse(BaseModel):
     history: List[Dict[str, str]]
 
+class BulkImportResponse(BaseModel):
+    rows_read: int
+    submitted: int
+    succeeded: int
+    failed: int
+    invalid: int
+    duplicates: int
+    errors: List[Dict[str, Any]]
+
 # The agent's details for health check
 agent_name = aptos_agent.name
 agent_address = None  # We'll extract this later
@@ -88,6 +102,41 @@ async def clear_chat_history():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing chat history: {str(e)}")
 
+# Bulk import: the request body is a CSV or JSONL file of one kind of row, read as it streams in.
+# Passing the same upload_id again resumes an interrupted import from its checkpoint.
+@app.post("/bulk/{kind}", response_model=BulkImportResponse)
+async def bulk_import(kind: str, request: Request, format: str = "csv",
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, upload_id: Optional[str] = None):
+    if kind not in BULK_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown kind: {kind}")
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    try:
+        checkpoint_path = api_checkpoint_path(kind, upload_id) if upload_id else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        rows = aread_rows(iter_lines(request.stream()), format)
+        return await import_rows(kind, rows, chunk_size, checkpoint_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing {kind}: {str(e)}")
+
+# Bulk export: streams the view function results as CSV or JSONL
+@app.get("/bulk/{kind}")
+async def bulk_export(kind: str, format: str = "jsonl", provider: Optional[str] = None):
+    if kind not in BULK_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown kind: {kind}")
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    provider = provider if provider else address
+    # Fetch the patients before streaming so a missing registry or node error is a proper error status
+    try:
+        patients = await call_view("get_patients", [provider])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting {kind}: {str(e)}")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(export_lines(kind, format, provider, patients), media_type=media_type)
+
 # Run the app
 if __name__ == "__main__":
     import uvicorn
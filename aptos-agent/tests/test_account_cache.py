@@ -0,0 +1,50 @@
+from account_cache import AccountSnapshotCache
+
+
+def test_put_keeps_newer_ledger_version():
+    cache = AccountSnapshotCache()
+    cache.put("0xab", "R", {"v": 2}, {"x-aptos-ledger-version": "10"})
+    snapshot = cache.put("0xab", "R", {"v": 1}, {"x-aptos-ledger-version": "5"})
+    assert snapshot["data"] == {"v": 2}
+    assert cache.get("0xAB", "R")["ledger_version"] == 10
+
+
+def test_returns_copies():
+    cache = AccountSnapshotCache()
+    cache.put("0xab", "R", {"v": [1]}, {})["data"]["v"].append(2)
+    cache.get("0xab", "R")["data"]["v"].append(3)
+    assert cache.get("0xab", "R")["data"] == {"v": [1]}
+
+
+def test_expired_snapshot_is_not_fresh():
+    cache = AccountSnapshotCache(max_age=0)
+    cache.put("0xab", "R", {}, {})
+    assert not cache.is_fresh(cache.get("0xab", "R"))
+
+
+def test_confirm_settles_every_address_of_a_hash():
+    cache = AccountSnapshotCache()
+    cache.mark_pending("0xab", "h1")
+    cache.mark_pending("0xcd", "h1")
+    cache.mark_pending("0xcd", "h2")
+    cache.put("0xab", "R", {}, {})
+    cache.put("0xcd", "R", {}, {})
+
+    cache.confirm("h1")
+    assert cache.pending("0xab") == set()
+    assert cache.pending("0xcd") == {"h2"}
+    assert cache.get("0xab", "R") is None
+    assert cache.get("0xcd", "R") is None
+
+    cache.confirm("h2")
+    assert cache._pending == {}
+    assert cache._pending_addresses == {}
+
+
+def test_mark_pending_invalidates_only_that_address():
+    cache = AccountSnapshotCache()
+    cache.put("0xab", "R", {}, {})
+    cache.put("0xcd", "R", {}, {})
+    cache.mark_pending("0xab", "h")
+    assert cache.get("0xab", "R") is None
+    assert cache.get("0xcd", "R") is not None
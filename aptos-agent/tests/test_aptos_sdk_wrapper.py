@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aptos_sdk")
+
+import aptos_sdk_wrapper
+from account_cache import AccountSnapshotCache
+
+ADDRESS = "0x" + "ab" * 32
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {"x-aptos-ledger-version": "7"}
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise aptos_sdk_wrapper.requests.exceptions.HTTPError(self.text)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(aptos_sdk_wrapper, "snapshot_cache", AccountSnapshotCache())
+
+
+def test_get_balance_uses_coin_balance_view_and_caches_it(monkeypatch):
+    calls = []
+
+    async def post(url, json):
+        calls.append((url, json))
+        return FakeResponse(["250000000"])
+
+    async def get(url):
+        raise AssertionError("balance must not read CoinStore")
+
+    monkeypatch.setattr(aptos_sdk_wrapper.rest_client.client, "post", post)
+    monkeypatch.setattr(aptos_sdk_wrapper.rest_client.client, "get", get)
+
+    assert asyncio.run(aptos_sdk_wrapper.get_balance(ADDRESS)) == 250000000
+    assert asyncio.run(aptos_sdk_wrapper.get_balance(ADDRESS)) == 250000000
+    assert len(calls) == 1
+    url, payload = calls[0]
+    assert url.endswith("/view")
+    assert payload["function"] == "0x1::coin::balance"
+    assert payload["type_arguments"] == ["0x1::aptos_coin::AptosCoin"]
+    snapshot = aptos_sdk_wrapper.snapshot_cache.get(ADDRESS, aptos_sdk_wrapper.APT_BALANCE_KEY)
+    assert snapshot["ledger_version"] == 7
+
+
+def test_get_account_resource_sync_caches_once_settled(monkeypatch):
+    calls = []
+
+    def get(url):
+        calls.append(url)
+        if "/transactions/by_hash/" in url:
+            return FakeResponse({"type": "user_transaction"})
+        return FakeResponse({"data": {"value": 1}})
+
+    monkeypatch.setattr(aptos_sdk_wrapper.requests, "get", get)
+    aptos_sdk_wrapper.snapshot_cache.mark_pending(ADDRESS, "0xh")
+
+    data = aptos_sdk_wrapper.get_account_resource_sync(ADDRESS, "0x1::account::Account")
+    data["data"]["value"] = 2
+    assert aptos_sdk_wrapper.get_account_resource_sync(ADDRESS, "0x1::account::Account") == {"data": {"value": 1}}
+    assert len(calls) == 2
+    assert aptos_sdk_wrapper.snapshot_cache.pending(ADDRESS) == set()
+
+
+def test_get_account_resource_sync_skips_cache_while_pending(monkeypatch):
+    def get(url):
+        if "/transactions/by_hash/" in url:
+            return FakeResponse({"type": "pending_transaction"})
+        return FakeResponse({"data": {}})
+
+    monkeypatch.setattr(aptos_sdk_wrapper.requests, "get", get)
+    aptos_sdk_wrapper.snapshot_cache.mark_pending(ADDRESS, "0xh")
+
+    aptos_sdk_wrapper.get_account_resource_sync(ADDRESS, "0x1::account::Account")
+    assert aptos_sdk_wrapper.snapshot_cache.get(ADDRESS, "0x1::account::Account") is None
+    assert aptos_sdk_wrapper.snapshot_cache.pending(ADDRESS) == {"0xh"}
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("aptos_sdk")
+pytest.importorskip("groq")
+
+import bulk
+
+
+def patient(patient_id, **overrides):
+    row = {
+        "patient_id": patient_id, "name": "Bob", "age": "40", "gender": "M", "contact": "555",
+        "email": "bob@example.com", "address": "1 Main St", "medical_history": "none",
+    }
+    row.update(overrides)
+    return row
+
+
+async def alist(rows):
+    return [row async for row in rows]
+
+
+async def stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_csv_bare_quote_in_unquoted_field_is_literal():
+    lines = [
+        "id,name,notes\n",
+        "p1,Bob,Height 5'10\" tall\n",
+        "p2,Ann,ok\n",
+        "p3,Eve,ok\n",
+    ]
+    rows = list(bulk.read_rows(lines, "csv"))
+    assert [row["id"] for _, row in rows] == ["p1", "p2", "p3"]
+    assert rows[0][1]["notes"] == "Height 5'10\" tall"
+
+
+def test_csv_quoted_field_spanning_lines():
+    rows = list(bulk.read_rows(["id,notes\n", '1,"two\n', 'lines"\n', "2,x\n"], "csv"))
+    assert rows == [(1, {"id": "1", "notes": "two\nlines"}), (2, {"id": "2", "notes": "x"})]
+
+
+def test_csv_wrong_column_count_is_reported_per_row():
+    rows = list(bulk.read_rows(["id,notes\n", "1,x,y\n", "2,z\n"], "csv"))
+    assert isinstance(rows[0][1], ValueError)
+    assert rows[1] == (2, {"id": "2", "notes": "z"})
+
+
+def test_jsonl_bad_line_is_reported_per_row():
+    rows = list(bulk.read_rows(['{"a": 1}\n', "not json\n", "\n", "[1, 2]\n"], "jsonl"))
+    assert rows[0] == (1, {"a": 1})
+    assert isinstance(rows[1][1], ValueError)
+    assert rows[2] == (3, [1, 2])
+
+
+def test_cli_file_with_bom(tmp_path):
+    path = tmp_path / "patients.csv"
+    path.write_text("patient_id,name\np1,Bob\n", encoding="utf-8-sig")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        assert list(bulk.read_rows(f, "csv")) == [(1, {"patient_id": "p1", "name": "Bob"})]
+
+
+def test_streamed_csv_strips_bom_and_handles_split_chunks():
+    body = "\ufeffid,notes\n1,\"a\nb\"\n2,é\n".encode("utf-8")
+    chunks = [body[i:i + 3] for i in range(0, len(body), 3)]
+    rows = asyncio.run(alist(bulk.aread_rows(bulk.iter_lines(stream(chunks)), "csv")))
+    assert rows == [(1, {"id": "1", "notes": "a\nb"}), (2, {"id": "2", "notes": "é"})]
+
+
+def test_validate_row_normalizes_ids():
+    _, values = bulk.validate_row("patients", patient(42, age=30.0))
+    assert values["patient_id"] == "42"
+    assert values["age"] == 30
+
+
+@pytest.mark.parametrize("age", [30.7, True, "30.7", 256, -1, ""])
+def test_validate_row_rejects_bad_u8(age):
+    with pytest.raises(ValueError):
+        bulk.validate_row("patients", patient("p1", age=age))
+
+
+def test_validate_row_rejects_non_objects():
+    with pytest.raises(ValueError):
+        bulk.validate_row("patients", [1, 2])
+
+
+@pytest.fixture
+def offline_import(monkeypatch):
+    """Runs import_rows without a node; rows listed in `failing` fail on chain."""
+    submitted = []
+    failing = set()
+
+    async def load(self):
+        self.patients = {"existing"}
+        self.ids = self.patients
+
+    async def settled_sequence_number():
+        return 0
+
+    async def submit_chunk(kind, chunk, sequence_number, summary):
+        failed = [row_number for row_number, _ in chunk if row_number in failing]
+        submitted.extend(row_number for row_number, _ in chunk)
+        summary["submitted"] += len(chunk)
+        summary["failed"] += len(failed)
+        summary["succeeded"] += len(chunk) - len(failed)
+        return failed
+
+    monkeypatch.setattr(bulk.ExistingIds, "load", load)
+    monkeypatch.setattr(bulk, "wait_for_settled_sequence_number", settled_sequence_number)
+    monkeypatch.setattr(bulk, "submit_chunk", submit_chunk)
+    return submitted, failing
+
+
+def test_import_counts_bad_rows_and_continues(offline_import):
+    submitted, _ = offline_import
+    rows = [(1, patient("p1")), (2, ValueError("invalid JSON")), (3, [1]), (4, patient("existing")),
+            (5, patient("p1")), (6, patient("p2"))]
+    summary = asyncio.run(bulk.import_rows("patients", rows, progress=lambda message: None))
+    assert submitted == [1, 6]
+    assert (summary["invalid"], summary["duplicates"]) == (2, 2)
+    assert [error["row"] for error in summary["errors"]] == [2, 3]
+
+
+def test_checkpoint_is_held_at_first_failed_row(offline_import, tmp_path):
+    submitted, failing = offline_import
+    failing.add(3)
+    checkpoint = tmp_path / "rows.checkpoint"
+    rows = [(n, patient(f"p{n}")) for n in range(1, 7)]
+
+    asyncio.run(bulk.import_rows("patients", rows, chunk_size=2,
+                                 checkpoint_path=str(checkpoint), progress=lambda message: None))
+    assert submitted == [1, 2, 3, 4, 5, 6]
+    assert json.loads(checkpoint.read_text()) == {"rows_done": 2}
+
+    # The rerun starts at the failed row
+    submitted.clear()
+    failing.clear()
+    asyncio.run(bulk.import_rows("patients", rows, chunk_size=2,
+                                 checkpoint_path=str(checkpoint), progress=lambda message: None))
+    assert submitted == [3, 4, 5, 6]
+    assert not checkpoint.exists()
+
+
+def test_chunk_size_is_clamped():
+    assert bulk.clamp_chunk_size(0) == 1
+    assert bulk.clamp_chunk_size(500) == bulk.MAX_CHUNK_SIZE